@@ -38,6 +38,12 @@ GREEN = (92, 116, 87)
 HIGHLIGHT = (255, 255, 117)
 #endregion
 
+#region Frame Pacing
+FRAME_RATE = 60         # the most frames drawn per second
+IDLE_TIMEOUT = 1000     # milliseconds to sleep waiting for input while nothing needs redrawing
+REDRAW_EVENTS = (pygame.MOUSEBUTTONUP, pygame.KEYDOWN, pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED)
+#endregion
+
 #region Grid Cell Size
 CELL_WIDTH = 25
 CELL_HEIGHT = 25
@@ -124,10 +130,13 @@ class App():
     DESCRIPTION
     The main application of the game. With support from the cross sum file, runs the game.
     """
-    def __init__(self) -> None:
+    def __init__(self, frame_rate : int = FRAME_RATE) -> None:
         """
         DESCRIPTION
         initializes the application
+
+        PARAMETERS
+        frame_rate : the most frames to draw per second
         """
         # Sys / App
         pygame.init()
@@ -135,6 +144,11 @@ class App():
         self.running = True
         self.mouse_position = None
 
+        # Frame Pacing
+        self.clock = pygame.time.Clock()
+        self.frame_rate = frame_rate
+        self.redraw = True
+
         # Buttons
         self.buttons = []
         self.initialize_buttons()
@@ -226,21 +240,35 @@ class App():
     def run(self) -> None:
         """
         DESCRIPTION
-        main method for the application, runs the events, updates, and drawing for each step or "tick" of the game
+        main method for the application, runs the events, updates, and drawing for each step or "tick" of the game.
+        the window is only redrawn when something has changed, and no more than frame_rate times per second
         """
         while self.running:
             self.events()
             self.update()
-            self.draw()
+            if self.redraw:
+                self.draw()
+                self.redraw = False
+            self.clock.tick(self.frame_rate)
         pygame.quit()
         sys.exit()
 
     def events(self) -> None:
         """
         DESCRIPTION
-        event handling for user input
+        event handling for user input. when there is no input and nothing to redraw, this waits for
+        the next event instead of returning right away, so the game does not use the CPU while idle
         """
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        if not events and not self.redraw:
+            event = pygame.event.wait(IDLE_TIMEOUT)
+            if event.type != pygame.NOEVENT:
+                events = [event] + pygame.event.get()
+
+        for event in events:
+            if event.type in REDRAW_EVENTS:
+                self.redraw = True
+
             if event.type == pygame.QUIT:
                 self.running = False
 
@@ -265,7 +293,10 @@ class App():
         """
         self.mouse_position = pygame.mouse.get_pos()
         for button in self.buttons:
+            was_hovered = button.hovered
             button.update(self.mouse_position)
+            if button.hovered != was_hovered:
+                self.redraw = True
 
     def draw(self) -> None:
         """
@@ -1,5 +1,7 @@
 import random
 import copy
+import time
+import functools
 
 # ====================================================================================================
 # cross_sum.py
@@ -9,6 +11,17 @@ import copy
 # =====================================================================================================
 
 
+#region Constants
+# Bit mask of the digits 1 through 9 (bit n set means digit n)
+DIGIT_MASK = 0b1111111110
+
+# Most branching guesses the solver may need for a puzzle to count as each difficulty, checked in order
+DIFFICULTY_LEVELS = {"easy": 0, "medium": 10, "hard": float("inf")}
+#endregion
+
+# Lookup tables for generate_puzzles, built on first use
+_digit_mask_tables = None
+
 #region Class(es)
 class Cell():
     """
@@ -36,7 +49,7 @@ class Cell():
 #endregion
 
 #region Main Functions
-def generate_puzzle(width : int, height : int) -> tuple:
+def generate_puzzle(width : int, height : int, deadline_ms : float = None, difficulty : str = None) -> tuple:
     """
     DESCRIPTION
     Generates a new cross sum puzzle for the player to solve
@@ -44,10 +57,17 @@ def generate_puzzle(width : int, height : int) -> tuple:
     PARAMETERS
     width: The width of the game board grid (x-axis)
     height: The height of the game board grid (y-axis)
+    deadline_ms: optional time budget in milliseconds. When given, puzzles are generated and checked
+                 until the budget runs out, and the best one found is returned (see generate_puzzle_by_deadline)
+    difficulty: the difficulty to aim for when deadline_ms is given, one of DIFFICULTY_LEVELS
 
     RETURNS
-    returns a tuple whose first element is the puzzle, and second element is the solution 
+    returns a tuple whose first element is the puzzle, and second element is the solution. When
+    deadline_ms is given, a third element holds a dictionary describing the puzzle that was returned
     """
+    if deadline_ms is not None:
+        return generate_puzzle_by_deadline(width, height, deadline_ms, difficulty)
+
     # Initialize grid
     grid = []
     grid_width = width
@@ -138,9 +158,455 @@ def check_solution(grid : list) -> bool:
                 if check_has_duplicate_values(grid, (i, j)):
                     return False
     return True
+
+def solve_puzzle(grid : list, limit : int = 1, deadline : float = None) -> tuple:
+    """
+    DESCRIPTION
+    Solves a cross sum puzzle using only its black cell headers, ignoring any values already in the
+    white cells. The search stops once limit solutions are found, so a limit of 2 is enough to tell
+    whether a puzzle has a unique solution.
+
+    PARAMETERS
+    grid : the puzzle to solve
+    limit : the most solutions to look for
+    deadline : optional time.perf_counter() value at which to give up
+
+    RETURN
+    returns a tuple whose first element is a list of solutions, each one a grid of values (None for
+    black cells), and second element is the number of branching guesses the search had to make
+
+    RAISES
+    TimeoutError if the deadline is reached before the search is finished
+    """
+    # Collect the runs of white cells and the header sum that caps each one (None if it has no header)
+    run_sums = []
+    cell_runs = {}
+    for i in range(len(grid)):
+        for j in range(len(grid[i])):
+            if grid[i][j].locked:
+                continue
+            if j == 0 or grid[i][j - 1].locked:
+                run_sums.append(grid[i][j - 1].across if j > 0 else None)
+                k = j
+                while k < len(grid[i]) and not grid[i][k].locked:
+                    cell_runs.setdefault((i, k), []).append(len(run_sums) - 1)
+                    k += 1
+            if i == 0 or grid[i - 1][j].locked:
+                run_sums.append(grid[i - 1][j].down if i > 0 else None)
+                k = i
+                while k < len(grid) and not grid[k][j].locked:
+                    cell_runs.setdefault((k, j), []).append(len(run_sums) - 1)
+                    k += 1
+
+    # Search state for every run: the sum still missing, the number of empty cells, and the used digits
+    remaining = list(run_sums)
+    empty = [0] * len(run_sums)
+    used = [0] * len(run_sums)
+    for runs in cell_runs.values():
+        for run in runs:
+            empty[run] += 1
+
+    values = [[None] * len(row) for row in grid]
+    solutions = []
+    guesses = 0
+
+    def search() -> None:
+        nonlocal guesses
+        if deadline is not None and time.perf_counter() > deadline:
+            raise TimeoutError("the puzzle could not be solved before the deadline")
+
+        # Fill the empty cell with the fewest candidates first
+        best_position = None
+        best_candidates = None
+        for position, runs in cell_runs.items():
+            if values[position[0]][position[1]] is not None:
+                continue
+            candidates = DIGIT_MASK
+            for run in runs:
+                candidates &= get_run_candidates(used[run], empty[run], remaining[run])
+            if best_candidates is None or bin(candidates).count("1") < bin(best_candidates).count("1"):
+                best_position = position
+                best_candidates = candidates
+                if not candidates:
+                    return
+
+        if best_position is None:
+            solutions.append([list(row) for row in values])
+            return
+
+        if bin(best_candidates).count("1") > 1:
+            guesses += 1
+        runs = cell_runs[best_position]
+        for digit in range(1, 10):
+            if not best_candidates & (1 << digit):
+                continue
+            values[best_position[0]][best_position[1]] = digit
+            for run in runs:
+                empty[run] -= 1
+                used[run] |= 1 << digit
+                if remaining[run] is not None:
+                    remaining[run] -= digit
+            search()
+            for run in runs:
+                empty[run] += 1
+                used[run] &= ~(1 << digit)
+                if remaining[run] is not None:
+                    remaining[run] += digit
+            values[best_position[0]][best_position[1]] = None
+            if len(solutions) >= limit:
+                return
+
+    search()
+    return (solutions, guesses)
+#endregion
+
+#region Batch Generation
+def generate_puzzles(count : int, width : int, height : int, seed : int = None) -> tuple:
+    """
+    DESCRIPTION
+    Generates a batch of cross sum puzzles of the same size at once using NumPy. The boards are
+    filled with the same rules as generate_puzzle, but every step is applied to all the boards in the
+    batch together, so the Python-level loop only runs once per cell instead of once per cell per board.
+
+    The boards are returned in a compact array format rather than as grids of Cell objects:
+    values : (count, height, width) int8 array holding the solution digit of each white cell, 0 for black cells
+    down : (count, height, width) uint8 array holding the down sum of each black cell, 0 if it has none
+    across : (count, height, width) uint8 array holding the across sum of each black cell, 0 if it has none
+
+    A single board can be turned into a playable grid with arrays_to_grid.
+
+    PARAMETERS
+    count : the number of boards to generate
+    width : the width of the game board grids (x-axis)
+    height : the height of the game board grids (y-axis)
+    seed : optional seed for the random number generator, for reproducible batches
+
+    RETURNS
+    returns a tuple of the values, down and across arrays
+    """
+    # NumPy is only needed for batch generation, so the game itself can run without it
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    popcount, nth_digit = get_digit_mask_tables()
+
+    values = np.zeros((count, height, width), dtype=np.int8)
+    down = np.zeros((count, height, width), dtype=np.uint8)
+    across = np.zeros((count, height, width), dtype=np.uint8)
+
+    # Same arbitrary black box limit as generate_puzzle, tracked separately for every board
+    black_boxes = np.zeros(count, dtype=np.int32)
+    black_boxes_limit = (((width - 2) * (height - 2)) * .25)
+
+    # Digits already used in the current vertical run of every column, as bit masks (bit n = digit n)
+    column_used = np.zeros((count, width), dtype=np.int16)
+
+    # Algorithm to generate (and solve) the puzzles, one cell position at a time across the whole batch
+    for i in range(1, height - 1):
+        # Digits already used in the current horizontal run, as bit masks
+        row_used = np.zeros(count, dtype=np.int16)
+        for j in range(1, width - 1):
+            brick = (rng.integers(1, 101, size=count) < 25) & (black_boxes < black_boxes_limit)
+            black_boxes += brick
+
+            available = ~(row_used | column_used[:, j]) & DIGIT_MASK
+            choices = popcount[available]
+            # Cells with no available numbers become black boxes, same as generate_puzzle
+            locked = brick | (choices == 0)
+
+            picks = (rng.random(count) * choices).astype(np.intp)
+            digits = np.where(locked, 0, nth_digit[available, picks])
+            values[:, i, j] = digits
+
+            bits = np.left_shift(1, digits.astype(np.int16)) & DIGIT_MASK
+            row_used = np.where(locked, 0, row_used | bits)
+            column_used[:, j] = np.where(locked, 0, column_used[:, j] | bits)
+
+    # Populate Black Cell Down and Across Values by accumulating the runs from the far side inwards
+    white = values > 0
+    run = np.zeros((count, height), dtype=np.int16)
+    for j in range(width - 1, -1, -1):
+        across[:, :, j] = np.where(white[:, :, j], 0, run)
+        run = np.where(white[:, :, j], run + values[:, :, j], 0)
+    run = np.zeros((count, width), dtype=np.int16)
+    for i in range(height - 1, -1, -1):
+        down[:, i, :] = np.where(white[:, i, :], 0, run)
+        run = np.where(white[:, i, :], run + values[:, i, :], 0)
+
+    return (values, down, across)
+
+def arrays_to_grid(values, down, across) -> tuple:
+    """
+    DESCRIPTION
+    Converts a single board from the compact array format used by generate_puzzles into the grid of
+    Cell objects used by the rest of the game
+
+    PARAMETERS
+    values : (height, width) array of solution digits, 0 for black cells
+    down : (height, width) array of down sums, 0 for none
+    across : (height, width) array of across sums, 0 for none
+
+    RETURNS
+    returns a tuple whose first element is the puzzle, and second element is the solution
+    """
+    grid = []
+    solution = []
+    for value_row, down_row, across_row in zip(values.tolist(), down.tolist(), across.tolist()):
+        grid_row = []
+        solution_row = []
+        for value, down_sum, across_sum in zip(value_row, down_row, across_row):
+            for row in (grid_row, solution_row):
+                cell = Cell(locked=(value == 0))
+                if cell.locked:
+                    cell.down = down_sum if down_sum else None
+                    cell.across = across_sum if across_sum else None
+                row.append(cell)
+            if value:
+                solution_row[-1].value = value
+        grid.append(grid_row)
+        solution.append(solution_row)
+    return (grid, solution)
+#endregion
+
+#region Import Functions
+def load_puzzles(path : str):
+    """
+    DESCRIPTION
+    Lazily loads the puzzles from a text file, one at a time, so that large collections can be
+    processed without holding more than one puzzle in memory. See read_puzzles for the file format.
+
+    PARAMETERS
+    path : the path of the file to load
+
+    RETURN
+    yields each puzzle as a grid of Cell objects
+    """
+    with open(path, encoding="utf-8") as file:
+        yield from read_puzzles(file)
+
+def read_puzzles(lines):
+    """
+    DESCRIPTION
+    Lazily parses puzzles from lines of text, one at a time. Each puzzle is written as rows of
+    whitespace separated cells, and puzzles are separated by blank lines. Lines starting with ';'
+    are comments. Each cell is one of:
+    _ or .       an empty white cell
+    1 to 9       a white cell with a value
+    # or X       a black cell with no headers
+    down\\across  a black cell with headers, where either side may be left empty (e.g. 23\\16, \\16, 23\\)
+
+    PARAMETERS
+    lines : an iterable of lines, such as an open file
+
+    RETURN
+    yields each puzzle as a grid of Cell objects
+
+    RAISES
+    ValueError if a cell cannot be parsed or the rows of a puzzle have different lengths
+    """
+    grid = []
+    for line_number, line in enumerate(lines, 1):
+        tokens = line.split()
+        if not tokens or tokens[0].startswith(";"):
+            if grid and not tokens:
+                yield grid
+                grid = []
+            continue
+        if grid and len(tokens) != len(grid[0]):
+            raise ValueError(f"line {line_number}: expected {len(grid[0])} cells, found {len(tokens)}")
+        row = []
+        for token in tokens:
+            try:
+                locked, value, down, across = parse_cell(token)
+            except ValueError as error:
+                raise ValueError(f"line {line_number}: {error}") from None
+            cell = Cell(locked)
+            cell.value = value
+            cell.down = down
+            cell.across = across
+            row.append(cell)
+        grid.append(row)
+    if grid:
+        yield grid
+
+@functools.lru_cache(maxsize=None)
+def parse_cell(token : str) -> tuple:
+    """
+    DESCRIPTION
+    A helper function of read_puzzles which parses the text of a single cell. Results are cached
+    since puzzle files only use a small number of distinct cells.
+
+    PARAMETERS
+    token : the text of the cell
+
+    RETURN
+    returns a tuple of the cell's locked, value, down and across attributes
+
+    RAISES
+    ValueError if the text is not a valid cell
+    """
+    if token in ("_", "."):
+        return (False, None, None, None)
+    if token in ("#", "X", "x"):
+        return (True, None, None, None)
+    if len(token) == 1 and "1" <= token <= "9":
+        return (False, int(token), None, None)
+    down, separator, across = token.partition("\\")
+    if separator and (not down or down.isdecimal()) and (not across or across.isdecimal()):
+        return (True, None, int(down) if down else None, int(across) if across else None)
+    raise ValueError(f"invalid cell {token!r}")
 #endregion
 
 #region Helper Functions
+def generate_puzzle_by_deadline(width : int, height : int, deadline_ms : float, difficulty : str = None) -> tuple:
+    """
+    DESCRIPTION
+    A helper function of generate_puzzle which keeps generating puzzles until the time budget runs out
+    and returns the best one found. Puzzles are ranked by whether they have a unique solution, then by
+    whether they match the requested difficulty, then by having fewer black cells. The search stops
+    early once a puzzle is unique and matches the difficulty.
+
+    PARAMETERS
+    width: The width of the game board grid (x-axis)
+    height: The height of the game board grid (y-axis)
+    deadline_ms: the time budget in milliseconds
+    difficulty: the difficulty to aim for, one of DIFFICULTY_LEVELS, or None for any
+
+    RETURNS
+    returns a tuple of the puzzle, the solution, and a dictionary with the keys:
+    unique : whether the puzzle has exactly one solution, None if the check ran out of time
+    difficulty : the difficulty of the puzzle, None if the check ran out of time
+    difficulty_matched : whether the difficulty matches the requested one, None if unknown
+    brick_density : the fraction of the inner cells that are black
+    candidates : the number of puzzles that were generated
+    elapsed_ms : the time spent generating puzzles
+    """
+    if difficulty is not None and difficulty not in DIFFICULTY_LEVELS:
+        raise ValueError(f"difficulty must be one of {list(DIFFICULTY_LEVELS)}, not {difficulty!r}")
+
+    start = time.perf_counter()
+    deadline = start + deadline_ms / 1000
+    best = None
+    best_rank = None
+    candidates = 0
+    candidate_time = 0
+
+    # Always generate at least one puzzle, then only start another if it is likely to finish in time
+    while best is None or time.perf_counter() + candidate_time < deadline:
+        candidate_start = time.perf_counter()
+        grid, solution = generate_puzzle(width, height)
+        candidates += 1
+        metadata = {
+            "unique": None,
+            "difficulty": None,
+            "difficulty_matched": None,
+            "brick_density": get_brick_density(grid),
+        }
+        try:
+            solutions, guesses = solve_puzzle(grid, limit=2, deadline=deadline)
+            metadata["unique"] = len(solutions) == 1
+            metadata["difficulty"] = get_difficulty(guesses)
+            metadata["difficulty_matched"] = difficulty is None or metadata["difficulty"] == difficulty
+        except TimeoutError:
+            pass
+
+        rank = (metadata["unique"] is True, metadata["difficulty_matched"] is True, -metadata["brick_density"])
+        if best_rank is None or rank > best_rank:
+            best = (grid, solution, metadata)
+            best_rank = rank
+        if rank[0] and rank[1]:
+            break
+        candidate_time = max(candidate_time, time.perf_counter() - candidate_start)
+
+    grid, solution, metadata = best
+    metadata["candidates"] = candidates
+    metadata["elapsed_ms"] = (time.perf_counter() - start) * 1000
+    return (grid, solution, metadata)
+
+def get_brick_density(grid : list) -> float:
+    """
+    DESCRIPTION
+    Returns the fraction of the inner cells of a grid (every cell except the outer border) that are black
+
+    PARAMETERS
+    grid : the grid to measure
+
+    RETURN
+    returns a float between 0 and 1
+    """
+    inner_rows = [row[1:-1] for row in grid[1:-1]]
+    inner_cells = sum(len(row) for row in inner_rows)
+    if inner_cells == 0:
+        return 0.0
+    return sum(cell.locked for row in inner_rows for cell in row) / inner_cells
+
+def get_difficulty(guesses : int) -> str:
+    """
+    DESCRIPTION
+    Returns the difficulty of a puzzle based on the number of branching guesses solve_puzzle made
+
+    PARAMETERS
+    guesses : the number of guesses returned by solve_puzzle
+
+    RETURN
+    returns one of the keys of DIFFICULTY_LEVELS
+    """
+    for name, max_guesses in DIFFICULTY_LEVELS.items():
+        if guesses <= max_guesses:
+            return name
+
+@functools.lru_cache(maxsize=None)
+def get_run_candidates(used : int, empty : int, remaining : int) -> int:
+    """
+    DESCRIPTION
+    A helper function of solve_puzzle which finds the digits that can still go into an empty cell of a
+    run, given the digits already used in it and the sum still missing from it
+
+    PARAMETERS
+    used : bit mask of the digits already used in the run
+    empty : the number of empty cells left in the run
+    remaining : the sum still missing from the run, or None if the run has no header
+
+    RETURN
+    returns a bit mask of the digits that can still be placed
+    """
+    candidates = 0
+    for digit in range(1, 10):
+        if used & (1 << digit):
+            continue
+        if remaining is None:
+            candidates |= 1 << digit
+            continue
+        # The other empty cells must be able to make up the rest of the sum with unused digits
+        others = [other for other in range(1, 10) if other != digit and not used & (1 << other)]
+        if len(others) < empty - 1:
+            continue
+        if sum(others[:empty - 1]) <= remaining - digit <= sum(others[len(others) - (empty - 1):]):
+            candidates |= 1 << digit
+    return candidates
+
+def get_digit_mask_tables() -> tuple:
+    """
+    DESCRIPTION
+    Returns the lookup tables used by generate_puzzles to work with sets of digits stored as bit masks
+    (bit n set means digit n is in the set). The tables are built once and reused.
+
+    RETURN
+    returns a tuple of two arrays: the number of digits in each mask, and the k-th smallest digit in
+    each mask (0 where the mask has fewer than k + 1 digits)
+    """
+    global _digit_mask_tables
+    if _digit_mask_tables is None:
+        import numpy as np
+        popcount = np.zeros(DIGIT_MASK + 1, dtype=np.intp)
+        nth_digit = np.zeros((DIGIT_MASK + 1, 9), dtype=np.int8)
+        for mask in range(DIGIT_MASK + 1):
+            digits = [digit for digit in range(1, 10) if mask & (1 << digit)]
+            popcount[mask] = len(digits)
+            nth_digit[mask, :len(digits)] = digits
+        _digit_mask_tables = (popcount, nth_digit)
+    return _digit_mask_tables
+
 def get_available_numbers(grid : list, position : tuple) -> set:
     """
     DESCRIPTION